@@ -0,0 +1,98 @@
+import json
+import struct
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Kompaktes binäres Spaltenformat, in dem der Proxy (`proxy.py`) Tabellen
+# ausliefert. Jede Spalte wird als Wörterbuch ihrer eindeutigen Werte plus
+# einem Array von Codes gespeichert. Da die Eurostat-Dimensionen nur wenige
+# verschiedene Werte haben, passen die Codes meist in ein einziges Byte.
+#
+# Aufbau: MAGIC | Länge des Headers (uint32, little endian) | Header (JSON)
+#         | Codes der ersten Spalte | Codes der zweiten Spalte | ...
+#
+# Der Code -1 steht für einen fehlenden Wert (`None`).
+
+MAGIC: bytes = b"ESC1"
+CONTENT_TYPE: str = "application/x-eurostat-columnar"
+
+_HEADER_LENGTH_FORMAT: str = "<I"
+
+
+def _get_code_dtype(dictionary_size: int) -> np.dtype:
+    for dtype in (np.int8, np.int16, np.int32):
+        if dictionary_size <= np.iinfo(dtype).max:
+            return np.dtype(dtype).newbyteorder('<')
+    return np.dtype(np.int64).newbyteorder('<')
+
+
+def _to_json_value(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Value {value!r} is not serializable!")
+
+
+def encode_dataframe(dataframe: pd.DataFrame) -> bytes:
+    index_names = [
+        name for name in dataframe.index.names if name is not None
+    ]
+    df = dataframe.reset_index() if index_names else dataframe
+
+    columns: List[Dict[str, Any]] = []
+    column_codes: List[bytes] = []
+    for position in range(df.shape[1]):
+        codes, uniques = pd.factorize(df.iloc[:, position])
+        dtype = _get_code_dtype(len(uniques))
+        columns.append({
+            'name': df.columns[position],
+            'dtype': dtype.str,
+            'dictionary': list(uniques)
+        })
+        column_codes.append(codes.astype(dtype).tobytes())
+
+    header = json.dumps({
+        'rows': len(df),
+        'index': index_names,
+        'columns_name': df.columns.name,
+        'columns': columns
+    }, default=_to_json_value).encode('utf-8')
+
+    return b"".join((
+        MAGIC,
+        struct.pack(_HEADER_LENGTH_FORMAT, len(header)),
+        header,
+        *column_codes
+    ))
+
+
+def decode_dataframe(content: bytes) -> pd.DataFrame:
+    assert content[:len(MAGIC)] == MAGIC, "content is not columnar data!"
+
+    offset = len(MAGIC)
+    (header_length,) = struct.unpack_from(
+        _HEADER_LENGTH_FORMAT, content, offset
+    )
+    offset += struct.calcsize(_HEADER_LENGTH_FORMAT)
+    header = json.loads(content[offset:offset + header_length])
+    offset += header_length
+
+    data = {}
+    for column in header['columns']:
+        dtype = np.dtype(column['dtype'])
+        codes = np.frombuffer(
+            content, dtype=dtype, count=header['rows'], offset=offset
+        )
+        offset += header['rows'] * dtype.itemsize
+        # Der Code -1 wählt das angehängte `None` aus.
+        dictionary = np.empty(len(column['dictionary']) + 1, dtype=object)
+        dictionary[:-1] = column['dictionary']
+        dictionary[-1] = None
+        data[column['name']] = dictionary[codes]
+
+    df = pd.DataFrame(data, columns=[c['name'] for c in header['columns']])
+    if header['index']:
+        df = df.set_index(header['index'])
+    df.columns.name = header['columns_name']
+    return df
@@ -12,22 +12,23 @@ class EurostatDataset:
     BASE_URL: str = (
         "https://ec.europa.eu/eurostat/api/dissemination/sdmx/3.0"
     )
-    METADATA_BASE_URL: str = f"{BASE_URL}/structure/dataflow/ESTAT"
-    DSD_BASE_URL: str = f"{BASE_URL}/structure/datastructure/ESTAT"
-    DATA_BASE_URL: str = f"{BASE_URL}/data/dataflow/ESTAT"
+    METADATA_PATH: str = "/structure/dataflow/ESTAT"
+    DSD_PATH: str = "/structure/datastructure/ESTAT"
+    DATA_PATH: str = "/data/dataflow/ESTAT"
+    METADATA_BASE_URL: str = f"{BASE_URL}{METADATA_PATH}"
+    DSD_BASE_URL: str = f"{BASE_URL}{DSD_PATH}"
+    DATA_BASE_URL: str = f"{BASE_URL}{DATA_PATH}"
 
     @classmethod
     def from_json_file(cls, json_filename: str):
         with open(json_filename, 'r') as file:
             json_data = json.load(file)
-        if 'none_value' in json_data:
-            dataset = cls(
-                json_data['dataset'],
-                json_data['language'],
-                json_data['none_value']
-            )
-        else:
-            dataset = cls(json_data['dataset'], json_data['language'])
+        kwargs = {
+            key: json_data[key]
+            for key in ('none_value', 'base_url')
+            if key in json_data
+        }
+        dataset = cls(json_data['dataset'], json_data['language'], **kwargs)
         if 'dimension_filter' in json_data:
             dimension_filter = DimensionFilter(dataset)
             for dimension_id, values in json_data['dimension_filter'].items():
@@ -45,26 +46,29 @@ class EurostatDataset:
     _dataset_id: str
     _language: str
     _none_value: Any
+    _base_url: str
     _version: str
     _datastructure_definition: DatastructureDefinition
     _filters: List[Filter]
     _data: SdmxData
 
     def __init__(
-        self, dataset_id: str, language: str, none_value: Any = "-"
+        self, dataset_id: str, language: str, none_value: Any = "-",
+        base_url: str = None
     ):
         assert isinstance(dataset_id, str), "dataset_id must be a string!"
 
         self._dataset_id = dataset_id
         self._language = language
         self._none_value = none_value
+        self._base_url = (base_url or self.BASE_URL).rstrip('/')
         self._filters = []
         self._request_version()
         self._request_datastructure_definition()
 
     def _request_version(self):
         response = request.get(
-            url=f"{self.METADATA_BASE_URL}/{self._dataset_id}/1.0",
+            url=f"{self.metadata_base_url}/{self._dataset_id}/1.0",
             params={
                 'compress': 'false',
                 'format': 'json'
@@ -79,7 +83,7 @@ class EurostatDataset:
 
     def _request_datastructure_definition(self):
         response = request.get(
-            url=f"{self.DSD_BASE_URL}/{self._dataset_id}/{self._version}",
+            url=f"{self.dsd_base_url}/{self._dataset_id}/{self._version}",
             params={
                 'compress': 'false'
             },
@@ -100,7 +104,7 @@ class EurostatDataset:
         for filter_ in self._filters:
             params.update(filter_.url_parameters)
         response = request.get(
-            url=f"{self.DATA_BASE_URL}/{self._dataset_id}/1.0/*",
+            url=f"{self.data_base_url}/{self._dataset_id}/1.0/*",
             params=params,
             headers={
                 'Accept-Language': self._language
@@ -115,6 +119,22 @@ class EurostatDataset:
     def request_data(self):
         self._data = SdmxData(self._request_data(), self._none_value)
 
+    @property
+    def base_url(self) -> str:
+        return self._base_url
+
+    @property
+    def metadata_base_url(self) -> str:
+        return f"{self._base_url}{self.METADATA_PATH}"
+
+    @property
+    def dsd_base_url(self) -> str:
+        return f"{self._base_url}{self.DSD_PATH}"
+
+    @property
+    def data_base_url(self) -> str:
+        return f"{self._base_url}{self.DATA_PATH}"
+
     @property
     def dimension_ids(self) -> List[str]:
         return self._datastructure_definition.dimension_ids
@@ -0,0 +1,535 @@
+import argparse
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urlsplit
+
+import pandas as pd
+import requests
+
+import eurostat_api.request as request
+from eurostat_api.columnar import CONTENT_TYPE as COLUMNAR_CONTENT_TYPE
+from eurostat_api.columnar import decode_dataframe, encode_dataframe
+from eurostat_api.dataset import EurostatDataset
+from eurostat_api.sdmx_data import SdmxData
+
+# Ein kleiner HTTP-Dienst, der vor den Eurostat-Servern sitzt und von vielen
+# Prozessen gemeinsam genutzt werden kann. Gleichzeitige identische Anfragen
+# werden nur einmal an Eurostat weitergeleitet, Antworten und geparste
+# `SdmxData`-Objekte landen in einem Speicher mit fester Obergrenze.
+#
+# Ein `EurostatDataset` nutzt den Proxy, indem man ihm dessen Adresse als
+# `base_url` übergibt. Zusätzlich beantwortet der Proxy unter `/query`
+# Slice-, Pivot- und Metadaten-Anfragen direkt aus dem Speicher. Tabellen
+# werden dabei im Spaltenformat aus `columnar.py` ausgeliefert.
+
+
+class _UpstreamResponse:
+
+    status: int
+    content_type: str
+    content: bytes
+
+    def __init__(self, status: int, content_type: str, content: bytes):
+        self.status = status
+        self.content_type = content_type
+        self.content = content
+
+
+class _UpstreamError(Exception):
+
+    response: _UpstreamResponse
+
+    def __init__(self, response: _UpstreamResponse):
+        super().__init__(f"Upstream responded with {response.status}!")
+        self.response = response
+
+
+class _BadRequest(Exception):
+    pass
+
+
+class _MemoryBoundedStore:
+
+    _max_bytes: int
+    _max_age: float
+    _entries: "OrderedDict[Any, Tuple[Any, int, float]]"
+    _size: int
+    _lock: threading.Lock
+
+    def __init__(self, max_bytes: int, max_age: float = None):
+        self._max_bytes = max_bytes
+        self._max_age = max_age
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            value, size, created = self._entries[key]
+            if (
+                self._max_age is not None
+                and time.monotonic() - created > self._max_age
+            ):
+                del self._entries[key]
+                self._size -= size
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def discard(self, key: Any):
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)[1]
+
+    def put(self, key: Any, value: Any, size: int):
+        if size > self._max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)[1]
+            while self._size + size > self._max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+            self._entries[key] = (value, size, time.monotonic())
+            self._size += size
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class _PendingCall:
+
+    event: threading.Event
+    result: Any
+    error: BaseException
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _RequestCoalescer:
+
+    _pending: Dict[Any, _PendingCall]
+    _lock: threading.Lock
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def run(self, key: Any, function: Callable[[], Any]) -> Any:
+        with self._lock:
+            pending = self._pending.get(key)
+            is_leader = pending is None
+            if is_leader:
+                pending = self._pending[key] = _PendingCall()
+
+        if not is_leader:
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.result
+
+        try:
+            pending.result = function()
+        except BaseException as error:
+            pending.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.event.set()
+        return pending.result
+
+
+class _ProxyHTTPServer(ThreadingHTTPServer):
+
+    daemon_threads: bool = True
+    proxy: "EurostatProxy"
+
+
+class _ProxyRequestHandler(BaseHTTPRequestHandler):
+
+    protocol_version: str = "HTTP/1.1"
+    server: _ProxyHTTPServer
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = parse_qsl(url.query, keep_blank_values=True)
+        try:
+            if url.path.startswith(f"{EurostatProxy.QUERY_PATH}/"):
+                self._handle_query(url.path, params)
+            elif url.path.startswith(EurostatProxy.UPSTREAM_PATHS):
+                self._handle_upstream(url.path, params)
+            else:
+                self._send(404, 'text/plain', b"Not found")
+        except _UpstreamError as error:
+            response = error.response
+            self._send(
+                response.status, response.content_type, response.content
+            )
+        except requests.RequestException as error:
+            self._send(502, 'text/plain', str(error).encode('utf-8'))
+        except (_BadRequest, AssertionError, KeyError, ValueError) as error:
+            self._send(400, 'text/plain', str(error).encode('utf-8'))
+        except Exception as error:
+            self._send(500, 'text/plain', str(error).encode('utf-8'))
+
+    def _handle_upstream(self, path: str, params: List[Tuple[str, str]]):
+        # Nur bekannte Eurostat-Pfade weiterleiten, damit z. B. über
+        # `%2e%2e` keine anderen Pfade auf dem Server erreichbar sind.
+        path = unquote(path)
+        if not EurostatProxy.UPSTREAM_PATH_PATTERN.fullmatch(path):
+            raise _BadRequest(f"Path '{path}' is not valid!")
+        response = self.server.proxy.get_upstream(
+            path, params, self.headers.get('Accept-Language', '')
+        )
+        self._send(response.status, response.content_type, response.content)
+
+    def _handle_query(self, path: str, params: List[Tuple[str, str]]):
+        _, _, query_type, dataset_id = path.split('/', 3)
+        if query_type not in EurostatProxy.QUERY_TYPES:
+            self._send(404, 'text/plain', b"Not found")
+            return
+        options = {
+            key: value for key, value in params
+            if key in EurostatProxy.QUERY_OPTIONS
+        }
+        dimension_values = {
+            key: value.split(',') for key, value in params
+            if key not in EurostatProxy.QUERY_OPTIONS
+        }
+        value_column = options.get('value_column', 'observation')
+        if value_column not in ('observation', 'status'):
+            raise _BadRequest(f"Value column '{value_column}' not supported!")
+        data = self.server.proxy.get_sdmx_data(
+            dataset_id,
+            options.get('language', 'en'),
+            options.get('none_value', '-')
+        )
+
+        if query_type == 'metadata':
+            self._send(
+                200, 'application/json',
+                json.dumps(_get_metadata(data)).encode('utf-8')
+            )
+            return
+
+        if query_type == 'slice':
+            df = data.dataframe
+            for dimension_id, values in dimension_values.items():
+                df = df[df[dimension_id].isin(values)]
+        else:
+            get_pivot_table = (
+                data.get_pivot_table if value_column == 'observation'
+                else data.get_status_pivot_table
+            )
+            df = get_pivot_table({
+                dimension_id: ','.join(values)
+                for dimension_id, values in dimension_values.items()
+            })
+        self._send(200, COLUMNAR_CONTENT_TYPE, encode_dataframe(df))
+
+    def _send(self, status: int, content_type: str, content: bytes):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format: str, *args: Any):
+        if self.server.proxy.verbose:
+            super().log_message(format, *args)
+
+
+def _get_metadata(data: SdmxData) -> Dict[str, Any]:
+    return {
+        'updated': data.updated.isoformat(),
+        'dimension_ids': data.dimension_ids,
+        'dataframe_columns': data.dataframe_columns,
+        'data_shape': data.data_shape,
+        'dimension_labels': data.dimension_labels,
+        'dimension_value_labels': data.dimension_value_labels,
+        'language': data.language,
+        'observation_count': data.observation_count,
+        'latest_period': data.latest_period,
+        'oldest_period': data.oldest_period,
+        'status_labels': data.status_labels
+    }
+
+
+class EurostatProxy:
+
+    QUERY_PATH: str = "/query"
+    QUERY_TYPES: Tuple[str] = ('slice', 'pivot', 'metadata')
+    QUERY_OPTIONS: Tuple[str] = ('language', 'none_value', 'value_column')
+    UPSTREAM_PATHS: Tuple[str] = ("/structure/", "/data/")
+    DATASET_ID_PATTERN: re.Pattern = re.compile(r"[A-Za-z0-9_\-]+")
+    UPSTREAM_PATH_PATTERN: re.Pattern = re.compile(
+        r"/(structure/(dataflow|datastructure)|data/dataflow)/ESTAT"
+        r"/[A-Za-z0-9_\-]+/[A-Za-z0-9_\-]+(\.[A-Za-z0-9_\-]+)*(/\*)?"
+    )
+    DEFAULT_MAX_BYTES: int = 512 * 1024 ** 2
+    DEFAULT_MAX_AGE: float = 24 * 60 * 60
+    DEFAULT_TIMEOUT: float = 60
+
+    _upstream_url: str
+    _timeout: float
+    _store: _MemoryBoundedStore
+    _coalescer: _RequestCoalescer
+    _server: _ProxyHTTPServer
+    _thread: threading.Thread
+    verbose: bool
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age: float = DEFAULT_MAX_AGE,
+        upstream_url: str = EurostatDataset.BASE_URL,
+        verbose: bool = False,
+        timeout: float = DEFAULT_TIMEOUT
+    ):
+        self._upstream_url = upstream_url.rstrip('/')
+        self._timeout = timeout
+        self._store = _MemoryBoundedStore(max_bytes, max_age)
+        self._coalescer = _RequestCoalescer()
+        self._server = _ProxyHTTPServer((host, port), _ProxyRequestHandler)
+        self._server.proxy = self
+        self._thread = None
+        self.verbose = verbose
+
+    def get_upstream(
+        self, path: str, params: List[Tuple[str, str]], language: str
+    ) -> _UpstreamResponse:
+        key = ('upstream', path, tuple(sorted(params)), language)
+
+        def fetch() -> _UpstreamResponse:
+            cached = self._store.get(key)
+            if cached is not None:
+                return cached
+            response = request.get(
+                url=f"{self._upstream_url}{path}",
+                params=params,
+                headers={
+                    'Accept-Language': language
+                },
+                timeout=self._timeout
+            )
+            result = _UpstreamResponse(
+                response.status_code,
+                response.headers.get(
+                    'Content-Type', 'application/octet-stream'
+                ),
+                response.content
+            )
+            if response.ok:
+                self._store.put(key, result, len(result.content))
+            return result
+
+        cached = self._store.get(key)
+        if cached is not None:
+            return cached
+        return self._coalescer.run(key, fetch)
+
+    def get_sdmx_data(
+        self, dataset_id: str, language: str, none_value: str
+    ) -> SdmxData:
+        if not self.DATASET_ID_PATTERN.fullmatch(dataset_id):
+            raise _BadRequest(f"Dataset id '{dataset_id}' is not valid!")
+        key = ('sdmx_data', dataset_id, language, none_value)
+
+        def parse() -> SdmxData:
+            cached = self._store.get(key)
+            if cached is not None:
+                return cached
+            path = f"{EurostatDataset.DATA_PATH}/{dataset_id}/1.0/*"
+            params = [('compress', 'false'), ('format', 'json')]
+            response = self.get_upstream(path, params, language)
+            if response.status != 200:
+                raise _UpstreamError(response)
+            try:
+                data = SdmxData(json.loads(response.content), none_value)
+            except Exception as error:
+                # Eine unbrauchbare Antwort soll nicht im Speicher bleiben.
+                self._store.discard(
+                    ('upstream', path, tuple(sorted(params)), language)
+                )
+                raise _UpstreamError(_UpstreamResponse(
+                    502, 'text/plain',
+                    f"Invalid upstream data: {error!r}".encode('utf-8')
+                ))
+            size = (
+                len(response.content)
+                + int(data.dataframe.memory_usage(deep=True).sum())
+                + int(data.index_dataframe.memory_usage(deep=True).sum())
+            )
+            self._store.put(key, data, size)
+            return data
+
+        cached = self._store.get(key)
+        if cached is not None:
+            return cached
+        return self._coalescer.run(key, parse)
+
+    def start(self):
+        assert self._thread is None, "Proxy is already running!"
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+        self._thread.start()
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def store_size(self) -> int:
+        return self._store.size
+
+
+class EurostatProxyClient:
+
+    _base_url: str
+
+    def __init__(self, base_url: str):
+        self._base_url = base_url.rstrip('/')
+
+    def _request_query(
+        self,
+        query_type: str,
+        dataset_id: str,
+        params: Dict[str, str]
+    ) -> requests.Response:
+        response = request.get(
+            url=(
+                f"{self._base_url}{EurostatProxy.QUERY_PATH}/{query_type}/"
+                f"{quote(dataset_id)}?{urlencode(params)}"
+            )
+        )
+        response.raise_for_status()
+        return response
+
+    def get_slice(
+        self,
+        dataset_id: str,
+        language: str,
+        dimension_values: Dict[str, List[str]],
+        none_value: str = "-"
+    ) -> pd.DataFrame:
+        params = {'language': language, 'none_value': none_value}
+        for dimension_id, values in dimension_values.items():
+            if isinstance(values, str):
+                values = [values]
+            params[dimension_id] = ','.join(values)
+        return decode_dataframe(
+            self._request_query('slice', dataset_id, params).content
+        )
+
+    def _get_pivot_table(
+        self,
+        dataset_id: str,
+        language: str,
+        dimension_values: Dict[str, str],
+        value_column: str,
+        none_value: str
+    ) -> pd.DataFrame:
+        params = {
+            'language': language,
+            'none_value': none_value,
+            'value_column': value_column
+        }
+        params.update(dimension_values)
+        return decode_dataframe(
+            self._request_query('pivot', dataset_id, params).content
+        )
+
+    def get_pivot_table(
+        self,
+        dataset_id: str,
+        language: str,
+        dimension_values: Dict[str, str],
+        none_value: str = "-"
+    ) -> pd.DataFrame:
+        return self._get_pivot_table(
+            dataset_id, language, dimension_values, 'observation', none_value
+        )
+
+    def get_status_pivot_table(
+        self,
+        dataset_id: str,
+        language: str,
+        dimension_values: Dict[str, str],
+        none_value: str = "-"
+    ) -> pd.DataFrame:
+        return self._get_pivot_table(
+            dataset_id, language, dimension_values, 'status', none_value
+        )
+
+    def get_metadata(
+        self, dataset_id: str, language: str, none_value: str = "-"
+    ) -> Dict[str, Any]:
+        return self._request_query(
+            'metadata', dataset_id,
+            {'language': language, 'none_value': none_value}
+        ).json()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Shared local proxy for the Eurostat API."
+    )
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument(
+        '--max-bytes', type=int, default=EurostatProxy.DEFAULT_MAX_BYTES
+    )
+    parser.add_argument(
+        '--max-age', type=float, default=EurostatProxy.DEFAULT_MAX_AGE,
+        help="seconds until cached data is refreshed, 0 to never refresh"
+    )
+    parser.add_argument('--upstream-url', default=EurostatDataset.BASE_URL)
+    parser.add_argument('--verbose', action='store_true')
+    parser.add_argument(
+        '--timeout', type=float, default=EurostatProxy.DEFAULT_TIMEOUT,
+        help="seconds to wait for a response from the Eurostat servers"
+    )
+    args = parser.parse_args()
+
+    proxy = EurostatProxy(
+        args.host, args.port, args.max_bytes, args.max_age or None,
+        args.upstream_url, args.verbose, args.timeout
+    )
+    print(f"Serving Eurostat proxy on {proxy.url}")
+    try:
+        proxy.serve_forever()
+    except KeyboardInterrupt:
+        proxy.stop()
@@ -0,0 +1,309 @@
+# Load test for the shared local proxy (see README.md). It runs entirely
+# against a local stand-in for the Eurostat servers, so no network access is
+# needed. Run it with `python3 load_test_proxy.py`.
+
+import http.client
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import requests
+
+from eurostat_api.columnar import decode_dataframe, encode_dataframe
+from eurostat_api.dataset import EurostatDataset
+from eurostat_api.filters import DimensionFilter
+from eurostat_api.proxy import EurostatProxy, EurostatProxyClient
+from eurostat_api.sdmx_data import SdmxData
+
+CONCURRENCY = 32
+REQUEST_COUNT = 64
+UPSTREAM_LATENCY = 0.1
+
+# ## Stand-in for the Eurostat servers
+
+DATAFLOW = json.dumps({
+    'extension': {'datastructure': {'version': '1.0'}}
+}).encode('utf-8')
+
+DATASTRUCTURE = b"""<m:Structure
+    xmlns:m="http://www.sdmx.org/resources/sdmxml/schemas/v3_0/message"
+    xmlns:s="http://www.sdmx.org/resources/sdmxml/schemas/v3_0/structure">
+<m:Structures><s:DataStructures><s:DataStructure>
+<s:DataStructureComponents><s:DimensionList>
+<s:Dimension id="sex" position="1"/>
+<s:Dimension id="geo" position="2"/>
+<s:Dimension id="time" position="3"/>
+</s:DimensionList></s:DataStructureComponents>
+</s:DataStructure></s:DataStructures></m:Structures>
+</m:Structure>"""
+
+DIMENSIONS = [
+    ('sex', ['M', 'F']),
+    ('geo', ['DE', 'FR', 'IT']),
+    ('time', ['2021', '2022'])
+]
+
+DATA = {
+    'updated': '2023-12-14T23:00:00+0100',
+    'id': [d_id for d_id, _ in DIMENSIONS],
+    'size': [len(values) for _, values in DIMENSIONS],
+    'dimension': {
+        d_id: {
+            'label': d_id,
+            'category': {
+                'index': {value: i for i, value in enumerate(values)},
+                'label': {value: value for value in values}
+            }
+        }
+        for d_id, values in DIMENSIONS
+    },
+    'value': {str(i): 70.0 + i for i in range(12) if i != 5},
+    'status': {'3': 'd', '5': 'c'},
+    'extension': {
+        'annotation': [{'type': 'OBS_COUNT', 'title': '12'}],
+        'lang': 'EN',
+        'status': {'label': {'d': 'definition differs', 'c': 'confidential'}}
+    }
+}
+
+# Dataset ids with a special meaning for the stand-in.
+MISSING_DATASET = 'missing'
+FAILING_DATASET = 'failing'
+GARBAGE_DATASET = 'garbage'
+SLOW_DATASET = 'slow'
+SLOW_LATENCY = 5.0
+
+hit_counts = {}
+hit_counts_lock = threading.Lock()
+
+
+def get_hits(path: str) -> int:
+    with hit_counts_lock:
+        return hit_counts.get(path, 0)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        with hit_counts_lock:
+            hit_counts[path] = hit_counts.get(path, 0) + 1
+        dataset_id = path.split('/')[4]
+        time.sleep(
+            SLOW_LATENCY if dataset_id == SLOW_DATASET else UPSTREAM_LATENCY
+        )
+
+        if dataset_id == MISSING_DATASET:
+            self._send(404, 'text/plain', b"No such dataset")
+        elif dataset_id == FAILING_DATASET:
+            self._send(500, 'text/plain', b"Internal error")
+        elif path.startswith('/structure/dataflow/'):
+            self._send(200, 'application/json', DATAFLOW)
+        elif path.startswith('/structure/datastructure/'):
+            self._send(200, 'application/xml', DATASTRUCTURE)
+        elif dataset_id == GARBAGE_DATASET:
+            self._send(200, 'application/json', b"{not json")
+        else:
+            self._send(200, 'application/json', json.dumps(DATA).encode())
+
+    def _send(self, status: int, content_type: str, content: bytes):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        try:
+            self.wfile.write(content)
+        except ConnectionError:
+            pass  # The proxy gave up waiting (see the timeout test).
+
+    def log_message(self, format, *args):
+        pass
+
+
+def dataflow_path(dataset_id: str) -> str:
+    return f"{EurostatDataset.METADATA_PATH}/{dataset_id}/1.0"
+
+
+def data_path(dataset_id: str) -> str:
+    return f"{EurostatDataset.DATA_PATH}/{dataset_id}/1.0/*"
+
+
+def run_concurrently(function, count: int = REQUEST_COUNT) -> list:
+    with ThreadPoolExecutor(CONCURRENCY) as executor:
+        return list(executor.map(lambda _: function(), range(count)))
+
+
+def assert_frame_equal(left: pd.DataFrame, right: pd.DataFrame):
+    pd.testing.assert_frame_equal(
+        left, right,
+        check_dtype=False, check_index_type=False, check_column_type=False
+    )
+
+
+upstream = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+upstream.daemon_threads = True
+threading.Thread(target=upstream.serve_forever, daemon=True).start()
+upstream_url = f"http://127.0.0.1:{upstream.server_address[1]}"
+
+proxy = EurostatProxy(port=0, upstream_url=upstream_url)
+proxy.start()
+client = EurostatProxyClient(proxy.url)
+expected = SdmxData(DATA, "-")
+
+# ## Concurrent identical requests reach the upstream only once
+
+dataset_id = 'datasets'
+
+
+def request_dataset() -> pd.DataFrame:
+    dataset = EurostatDataset(dataset_id, 'en', base_url=proxy.url)
+    DimensionFilter(dataset).add('sex', ['F'])
+    dataset.request_data()
+    return dataset.data.dataframe
+
+
+for dataframe in run_concurrently(request_dataset):
+    assert_frame_equal(dataframe, expected.dataframe)
+for path in (
+    dataflow_path(dataset_id),
+    f"{EurostatDataset.DSD_PATH}/{dataset_id}/1.0",
+    data_path(dataset_id)
+):
+    assert get_hits(path) == 1, f"{path} was requested {get_hits(path)}x!"
+print(f"{REQUEST_COUNT} concurrent datasets: 1 upstream hit per endpoint")
+
+dataset_id = 'slices'
+slice_values = {'sex': ['F'], 'time': ['2022']}
+for dataframe in run_concurrently(
+    lambda: client.get_slice(dataset_id, 'en', slice_values)
+):
+    df = expected.dataframe
+    for dimension_id, values in slice_values.items():
+        df = df[df[dimension_id].isin(values)]
+    assert_frame_equal(dataframe, df.reset_index(drop=True))
+assert_frame_equal(
+    client.get_slice(dataset_id, 'en', {'sex': 'F', 'time': '2022'}),
+    client.get_slice(dataset_id, 'en', slice_values)
+)
+assert get_hits(data_path(dataset_id)) == 1
+print(f"{REQUEST_COUNT} concurrent slices: 1 upstream hit")
+
+# ## Pivot tables and metadata
+
+for dataframe in run_concurrently(
+    lambda: client.get_pivot_table(dataset_id, 'en', {'sex': 'F'})
+):
+    assert_frame_equal(dataframe, expected.get_pivot_table({'sex': 'F'}))
+for dataframe in run_concurrently(
+    lambda: client.get_status_pivot_table(dataset_id, 'en', {'sex': 'M'})
+):
+    assert_frame_equal(
+        dataframe, expected.get_status_pivot_table({'sex': 'M'})
+    )
+metadata = client.get_metadata(dataset_id, 'en')
+assert metadata['data_shape'] == list(expected.data_shape)
+assert metadata['status_labels'] == expected.status_labels
+assert get_hits(data_path(dataset_id)) == 1
+print("Pivot tables and metadata: served from memory")
+
+# ## Column format round trip
+
+for dataframe in (
+    expected.dataframe,
+    expected.index_dataframe,
+    expected.get_pivot_table({'sex': 'F'}),
+    expected.get_status_pivot_table({'sex': 'M'}),
+    pd.DataFrame({'a': ['x', None, 'y'], 'b': [str(i) for i in range(3)]}),
+    pd.DataFrame({'many': [str(i) for i in range(70000)]})
+):
+    decoded = decode_dataframe(encode_dataframe(dataframe))
+    if dataframe.index.name is None:
+        dataframe = dataframe.reset_index(drop=True)
+    assert_frame_equal(decoded, dataframe)
+print("Column format: round trip unchanged")
+
+# ## Upstream errors are passed through and not cached
+
+for dataset_id, status in ((MISSING_DATASET, 404), (FAILING_DATASET, 500)):
+    for _ in range(2):
+        response = requests.get(f"{proxy.url}{dataflow_path(dataset_id)}")
+        assert response.status_code == status
+        response = requests.get(f"{proxy.url}/query/slice/{dataset_id}")
+        assert response.status_code == status
+    assert get_hits(dataflow_path(dataset_id)) == 2
+    assert get_hits(data_path(dataset_id)) == 2
+
+for _ in range(2):
+    response = requests.get(f"{proxy.url}/query/slice/{GARBAGE_DATASET}")
+    assert response.status_code == 502
+assert get_hits(data_path(GARBAGE_DATASET)) == 2
+
+# `requests` would normalize the dot segments, so the paths are sent as is.
+host, port = proxy.url[len("http://"):].split(':')
+for path in (
+    "/query/slice/a/b", "/query/slice/..", "/query/slice/..%2f",
+    "/query/pivot/slices?value_column=bogus",
+    "/data/../secret", "/data/%2e%2e/secret",
+    "/data/dataflow/ESTAT/x/1.0/%2e%2e/%2e%2e/secret",
+    "/structure/dataflow/ESTAT/x/%2e%2e"
+):
+    connection = http.client.HTTPConnection(host, int(port))
+    connection.request('GET', path)
+    assert connection.getresponse().status == 400
+    connection.close()
+print("Upstream errors: passed through, not cached")
+
+proxy.stop()
+
+# ## Eviction once max_bytes is exceeded
+
+proxy = EurostatProxy(
+    port=0, upstream_url=upstream_url, max_bytes=int(len(DATAFLOW) * 1.5)
+)
+proxy.start()
+for dataset_id, hits in (
+    ('evict_a', 1), ('evict_a', 1), ('evict_b', 1), ('evict_a', 2)
+):
+    response = requests.get(f"{proxy.url}{dataflow_path(dataset_id)}")
+    assert response.status_code == 200
+    assert get_hits(dataflow_path(dataset_id)) == hits
+assert proxy.store_size <= int(len(DATAFLOW) * 1.5)
+proxy.stop()
+print("max_bytes: least recently used entries are evicted")
+
+# ## Expiry after max_age
+
+max_age = 0.5
+proxy = EurostatProxy(port=0, upstream_url=upstream_url, max_age=max_age)
+proxy.start()
+for hits in (1, 1):
+    requests.get(f"{proxy.url}{dataflow_path('expire')}")
+    assert get_hits(dataflow_path('expire')) == hits
+time.sleep(max_age * 1.5)
+requests.get(f"{proxy.url}{dataflow_path('expire')}")
+assert get_hits(dataflow_path('expire')) == 2
+proxy.stop()
+print("max_age: expired entries are requested again")
+
+# ## A hanging upstream does not block the waiting clients
+
+timeout = 0.5
+proxy = EurostatProxy(port=0, upstream_url=upstream_url, timeout=timeout)
+proxy.start()
+start = time.monotonic()
+for response in run_concurrently(
+    lambda: requests.get(f"{proxy.url}/query/slice/{SLOW_DATASET}"),
+    CONCURRENCY
+):
+    assert response.status_code == 502
+assert time.monotonic() - start < SLOW_LATENCY
+proxy.stop()
+print("timeout: waiting clients get 502 instead of hanging")
+
+upstream.shutdown()
+print("All load tests passed.")